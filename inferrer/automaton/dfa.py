@@ -1,10 +1,12 @@
 import graphviz
 import tempfile
-import copy
 from inferrer import utils
+from inferrer.automaton import kernels
 from inferrer.automaton.state import State
 from inferrer.automaton.fsa import FSA
-from collections import defaultdict, OrderedDict, deque
+from array import array
+from bisect import insort
+from collections import defaultdict, deque
 from typing import Set, Tuple, List, Generator
 
 
@@ -31,7 +33,16 @@ class DFA(FSA):
 
         self.reject_states = set()
 
-        self._transitions = defaultdict(OrderedDict)
+        self._transitions = defaultdict(dict)
+
+        self._rev = defaultdict(list)
+        self._src_rank = {}
+
+        self._sym_id = {a: i for i, a in enumerate(sorted(alphabet))}
+        self._alpha_n = len(self._sym_id)
+        self._state_id = {}
+        self._states_by_id = []
+        self._trans = array('i')
 
     def parse_string(self, s: str) -> Tuple[State, bool]:
         """
@@ -44,13 +55,16 @@ class DFA(FSA):
                  the dfa accepted the input string.
         :rtype: tuple(State, bool)
         """
-        q = self._start_state
-        for letter in s:
-            if not self.transition_exists(q, letter):
-                return q, False
-            q = self.transition(q, letter)
+        q = self._state_id.get(self._start_state)
+        if q is None:
+            if s:
+                return self._start_state, False
+            return self._start_state, self._start_state in self.accept_states
 
-        return q, q in self.accept_states
+        q, read = kernels.parse(self._trans, self._alpha_n, q, s, self._sym_id)
+
+        q = self._states_by_id[q]
+        return q, read and q in self.accept_states
 
     def add_transition(self, q1: State, q2: State, a: str):
         """
@@ -68,7 +82,40 @@ class DFA(FSA):
             raise ValueError('\'{}\' is not in the alphabet of the dfa!'.format(a))
 
         self.states.update({q1, q2})
-        self._transitions[q1][a] = q2
+
+        from_map = self._transitions[q1]
+        rank = self._src_rank.setdefault(q1, len(self._src_rank))
+
+        old_q2 = from_map.get(a)
+        if old_q2 is None:
+            key = (rank, len(from_map), q1, a)
+        else:
+            key = (rank, list(from_map).index(a), q1, a)
+            self._rev[old_q2].remove(key)
+
+        from_map[a] = q2
+        insort(self._rev[q2], key)
+
+        q1_id = self._intern_state(q1)
+        self._trans[q1_id * self._alpha_n + self._sym_id[a]] = self._intern_state(q2)
+
+    def _intern_state(self, q: State) -> int:
+        """
+        Returns the integer id of the state q in the flat
+        transition table, assigning the next free id (and
+        an empty row in the table) if q has not been seen.
+
+        :param q: state
+        :type q: State
+        :return: id of q
+        :rtype: int
+        """
+        q_id = self._state_id.get(q)
+        if q_id is None:
+            q_id = self._state_id[q] = len(self._states_by_id)
+            self._states_by_id.append(q)
+            self._trans.extend([-1] * self._alpha_n)
+        return q_id
 
     def transition_exists(self, q1: State, a: str) -> bool:
         """
@@ -82,9 +129,8 @@ class DFA(FSA):
         :return: True if it exists
         :rtype: bool
         """
-        return q1 in self._transitions and \
-               a in self._transitions[q1] and \
-               self._transitions[q1][a] in self.states
+        from_map = self._transitions.get(q1)
+        return from_map is not None and a in from_map
 
     def transition(self, q1: State, a: str) -> State:
         """
@@ -127,18 +173,21 @@ class DFA(FSA):
         """
         Finds the State r that satisfies
         delta(q, a) = r where a is a string in the
-        alphabet
+        alphabet. The incoming transitions of every
+        state are indexed when they are added, ordered
+        as they appear in the transition table.
 
         :param q: Target state
         :type q: automaton.State
         :return: The state and whether or not the transition exists
         :rtype: tuple(State, str)
         """
-        for qf in self._transitions.keys():
-            for letter, to_state in self._transitions[qf].items():
-                if to_state == q:
-                    return qf, letter
-        return None, None
+        incoming = self._rev.get(q)
+        if not incoming:
+            return None, None
+
+        _, _, qf, letter = incoming[0]
+        return qf, letter
 
     def find_transitions_to_q_with_letter(self, q: State, a: str) -> Set[State]:
         """
@@ -153,12 +202,7 @@ class DFA(FSA):
         :return: The set of states
         :rtype: Set[State]
         """
-        states = set()
-        for qf in self._transitions.keys():
-            for letter, to_state in self._transitions[qf].items():
-                if to_state == q and letter == a:
-                    states.add(qf)
-        return states
+        return {qf for _, _, qf, letter in self._rev.get(q, ()) if letter == a}
 
     def minimize(self):
         """
@@ -236,29 +280,43 @@ class DFA(FSA):
         Minimizes the dfa by removing all
         states (and transitions) that cannot be
         reached from the initial state. This is
-        done by performing an iterative dept-first
-        search over the execution tree given the
-        initial state and alphabet.
+        done by performing a breadth-first search
+        over the flat transition table, starting
+        at the initial state.
 
         :return: minimized dfa
         :rtype: DFA
         """
         new_dfa = DFA(self.alphabet, self._start_state)
-        stack = [self._start_state]
-        visited_states = {self._start_state}
-        while stack:
-            state = stack.pop()
-
-            new_dfa.states.add(state)
-
-            for a in self.alphabet:
-                if state in self._transitions and a in self._transitions[state]:
-                    to_state = self.transition(state, a)
-                    new_dfa.add_transition(state, to_state, a)
-                    if to_state not in visited_states:
-                        stack.append(to_state)
-                        visited_states.add(to_state)
-
+        reachable = [self._start_state]
+
+        start = self._state_id.get(self._start_state)
+        if start is not None:
+            alphabet = sorted(self.alphabet)
+            n_sym = self._alpha_n
+            trans = self._trans
+
+            visited = bytearray(len(self._states_by_id))
+            visited[start] = 1
+            queue = deque([start])
+
+            while queue:
+                q = queue.popleft()
+                state = self._states_by_id[q]
+
+                for a in range(n_sym):
+                    r = trans[q * n_sym + a]
+                    if r < 0:
+                        continue
+
+                    to_state = self._states_by_id[r]
+                    new_dfa.add_transition(state, to_state, alphabet[a])
+                    if not visited[r]:
+                        visited[r] = 1
+                        queue.append(r)
+                        reachable.append(to_state)
+
+        for state in reachable:
             if state in self.accept_states:
                 new_dfa.accept_states.add(state)
             elif state in self.reject_states:
@@ -308,7 +366,8 @@ class DFA(FSA):
 
     def copy(self):
         """
-        Performs a deep copy of this instance.
+        Performs a deep copy of this instance. States
+        are immutable, so they are shared with the copy.
 
         :return: A copied dfa
         :rtype: DFA
@@ -318,7 +377,14 @@ class DFA(FSA):
         cp.states = self.states.copy()
         cp.accept_states = self.accept_states.copy()
         cp.reject_states = self.reject_states.copy()
-        cp._transitions = copy.deepcopy(self._transitions)
+        for q, from_map in self._transitions.items():
+            cp._transitions[q] = from_map.copy()
+        for q, incoming in self._rev.items():
+            cp._rev[q] = incoming.copy()
+        cp._src_rank = self._src_rank.copy()
+        cp._state_id = self._state_id.copy()
+        cp._states_by_id = self._states_by_id.copy()
+        cp._trans = self._trans[:]
 
         return cp
 
@@ -473,20 +539,21 @@ class DFA(FSA):
         :return: String representation of the dfa
         :rtype: str
         """
-        rep = [
-            'Initial state:    = {}'.format(self._start_state),
-            'Alphabet:         = {}'.format(self.alphabet),
-            'States:           = {}'.format(set(map(str, self.states))),
-            'Accepting states: = {}'.format(set(map(str, self.accept_states))),
-            'Rejecting states: = {}'.format(set(map(str, self.reject_states))),
-            '\nTransition function: delta'
-        ]
-
-        for state in sorted(self._transitions.keys()):
-            rep.append('state = q_{}'.format(state))
+        rep = []
+        add = rep.append
+
+        add(f'Initial state:    = {self._start_state}')
+        add(f'Alphabet:         = {self.alphabet}')
+        add(f'States:           = {self._fmt_states(self.states)}')
+        add(f'Accepting states: = {self._fmt_states(self.accept_states)}')
+        add(f'Rejecting states: = {self._fmt_states(self.reject_states)}')
+        add('\nTransition function: delta')
+
+        for state in sorted(self._transitions):
+            add(f'state = q_{state}')
             for letter, to_state in self._transitions[state].items():
-                rep.append('delta(q_{}, {}) = q_{}'.format(state, letter, to_state))
-            rep.append('')
+                add(f'delta(q_{state}, {letter}) = q_{to_state}')
+            add('')
 
         return '\n'.join(rep)
 
@@ -508,30 +575,30 @@ def build_pta(s_plus: Set[str], s_minus: Set[str]=set()) -> DFA:
     alphabet = utils.determine_alphabet(samples)
     pta = DFA(alphabet)
 
-    for letter in alphabet:
-        pta.add_transition(State(''), State(letter), letter)
-
-    states = {
-        State(u) for u in utils.prefix_set(samples)
-    }
-
-    new_states = set()
-    for u in states:
-        for a in alphabet:
-            ua = State(u.name + a)
-            if ua not in states:
-                new_states.add(ua)
-
-            pta.add_transition(u, ua, a)
-
-    states.update(new_states)
-
-    for u in states:
-        if u.name in s_plus:
-            pta.accept_states.add(u)
-        if u.name in s_minus:
-            pta.reject_states.add(u)
-
-    pta.states = states
+    # In sorted order the strings sharing a prefix are adjacent,
+    # so only the part of w after its longest common prefix with
+    # the previous sample needs new states.
+    prefix_to_state = {'': pta._start_state}
+    path = [pta._start_state]
+    prev = ''
+    for w in sorted(samples):
+        k = 0
+        n = min(len(prev), len(w))
+        while k < n and prev[k] == w[k]:
+            k += 1
+        del path[k + 1:]
+
+        for i in range(k, len(w)):
+            state = prefix_to_state[w[:i + 1]] = State(w[:i + 1])
+            pta.add_transition(path[-1], state, w[i])
+            path.append(state)
+        prev = w
+
+    pta.states = set(prefix_to_state.values())
+
+    for w in s_plus:
+        pta.accept_states.add(prefix_to_state[w])
+    for w in s_minus:
+        pta.reject_states.add(prefix_to_state[w])
 
     return pta
@@ -34,3 +34,18 @@ class FSA(abc.ABC):
         :rtype: tuple(State, bool)
         """
         pass
+
+    @staticmethod
+    def _fmt_states(states: Set[automaton.State]) -> str:
+        """
+        Formats a set of states as the set of their
+        names, used by the string representations.
+
+        :param states: The states to format
+        :type states: Set[State]
+        :return: The formatted set of names
+        :rtype: str
+        """
+        if len(states) == 0:
+            return 'set()'
+        return '{' + ', '.join(repr(q.name) for q in states) + '}'
@@ -0,0 +1,149 @@
+"""
+Module containing the inner loop that runs a string
+through a dfa stored as a flat transition table,
+table[q * n_sym + a] = r, where r = -1 means that the
+transition is undefined.
+
+If numba (and numpy) are installed, long strings are
+run through a version of the loop compiled to native
+code, otherwise the pure Python loop is used. The
+characters of the string are then mapped to symbol
+ids with a numpy lookup table indexed by the latin-1
+code point of the character. Numba is only imported,
+and the loop only compiled, the first time a string of
+at least NATIVE_MIN_LENGTH characters is parsed.
+"""
+
+from array import array
+from functools import lru_cache
+from typing import Dict, Tuple
+
+np = None
+
+NATIVE_MIN_LENGTH = 64
+
+_run_native = None
+_native_loaded = False
+
+
+def run(trans, n_sym: int, q: int, syms) -> Tuple[int, bool]:
+    """
+    Runs the sequence of symbol ids syms through the
+    transition table trans, starting in the state with
+    id q.
+
+    :param trans: Flat transition table
+    :param n_sym: Size of the alphabet
+    :type n_sym: int
+    :param q: Id of the state to start in
+    :type q: int
+    :param syms: Sequence of symbol ids, -1 for a symbol
+                 that is not in the alphabet.
+    :return: The id of the last state reached and whether
+             the whole sequence could be read.
+    :rtype: Tuple[int, bool]
+    """
+    for i in range(len(syms)):
+        a = syms[i]
+        if a < 0:
+            return q, False
+        r = trans[q * n_sym + a]
+        if r < 0:
+            return q, False
+        q = r
+    return q, True
+
+
+def _load_native():
+    """
+    Imports numpy and numba and compiles run to native
+    code, the first time it is called.
+
+    :return: The compiled version of run, or None if
+             numba is not available.
+    """
+    global np, _run_native, _native_loaded
+    if not _native_loaded:
+        _native_loaded = True
+        try:
+            import numpy
+            from numba import njit
+        except ImportError:
+            return None
+
+        np = numpy
+        _run_native = njit(cache=True)(run)
+
+    return _run_native
+
+
+def char_table(sym_id: Dict[str, int]):
+    """
+    Builds the lookup table that maps the latin-1 code
+    point of a character to its symbol id, or to -1 if
+    the character is not in the alphabet.
+
+    :param sym_id: Maps every symbol in the alphabet to its id
+    :type sym_id: Dict[str, int]
+    :return: The lookup table, or None if numba is not
+             available or a symbol is not a latin-1 character.
+    :rtype: numpy.ndarray
+    """
+    if _load_native() is None:
+        return None
+
+    table = np.full(256, -1, dtype=np.intc)
+    for letter, a in sym_id.items():
+        if len(letter) != 1 or ord(letter) > 255:
+            return None
+        table[ord(letter)] = a
+    return table
+
+
+@lru_cache(maxsize=None)
+def _cached_char_table(sym_items: Tuple[Tuple[str, int], ...]):
+    return char_table(dict(sym_items))
+
+
+def parse(trans: array, n_sym: int, q: int, s: str,
+          sym_id: Dict[str, int], table=None) -> Tuple[int, bool]:
+    """
+    Runs the string s through the transition table trans,
+    starting in the state with id q.
+
+    :param trans: Flat transition table
+    :type trans: array
+    :param n_sym: Size of the alphabet
+    :type n_sym: int
+    :param q: Id of the state to start in
+    :type q: int
+    :param s: The string to parse
+    :type s: str
+    :param sym_id: Maps every symbol in the alphabet to its id
+    :type sym_id: Dict[str, int]
+    :param table: Lookup table built by char_table(sym_id), if
+                  not given it is built once per alphabet.
+    :type table: numpy.ndarray
+    :return: The id of the last state reached and whether
+             the whole string could be read.
+    :rtype: Tuple[int, bool]
+    """
+    if len(s) >= NATIVE_MIN_LENGTH and _load_native() is not None:
+        if table is None:
+            table = _cached_char_table(tuple(sym_id.items()))
+
+        syms = None
+        if table is not None:
+            try:
+                syms = table[np.frombuffer(s.encode('latin-1'), dtype=np.uint8)]
+            except UnicodeEncodeError:
+                pass
+
+        if syms is None:
+            syms = np.fromiter((sym_id.get(letter, -1) for letter in s),
+                               dtype=np.intc, count=len(s))
+        q, ok = _run_native(np.frombuffer(trans, dtype=np.intc), n_sym, q, syms)
+        return int(q), bool(ok)
+
+    sym = sym_id.get
+    return run(trans, n_sym, q, [sym(letter, -1) for letter in s])
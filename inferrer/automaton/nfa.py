@@ -1,14 +1,28 @@
-from itertools import chain, combinations
+from inferrer.automaton import kernels
 from inferrer.automaton.fsa import FSA
 from inferrer.automaton.state import State
 from inferrer.automaton.dfa import DFA
-from collections import defaultdict, OrderedDict, deque
+from collections import defaultdict, deque
 from typing import Set, List, Tuple
-import copy
+from array import array
 import graphviz
 import tempfile
 
 
+def _bits(x: int):
+    """
+    Yields the positions of the set bits of x,
+    from the least to the most significant one.
+
+    :param x: Bitset to iterate over
+    :type x: int
+    """
+    while x:
+        lsb = x & -x
+        yield lsb.bit_length() - 1
+        x ^= lsb
+
+
 class NFA(FSA):
     """
     Implements a non-deterministic finite automaton.
@@ -24,7 +38,17 @@ class NFA(FSA):
         self._states = set()
         self._accept_states = set()
 
-        self._transitions = defaultdict(OrderedDict)
+        self._transitions = defaultdict(dict)
+
+        self._sym_id = {a: i for i, a in enumerate(sorted(alphabet))}
+        self._alpha_n = len(self._sym_id)
+        self._state_id = {}
+        self._states_by_id = []
+        self._nfa_trans = []
+        self._eps_trans = []
+
+        self._dfa_trans = None
+        self._dfa_dirty = True
 
     def add_transition(self, q1: State, q2: State, a: str):
         """
@@ -48,6 +72,38 @@ class NFA(FSA):
 
         from_map[a].add(q2)
 
+        q1_id = self._intern_state(q1)
+        q2_bit = 1 << self._intern_state(q2)
+        if a == '':
+            if not self._eps_trans[q1_id] & q2_bit:
+                self._eps_trans[q1_id] |= q2_bit
+                self._dfa_dirty = True
+        else:
+            i = q1_id * self._alpha_n + self._sym_id[a]
+            if not self._nfa_trans[i] & q2_bit:
+                self._nfa_trans[i] |= q2_bit
+                self._dfa_dirty = True
+
+    def _intern_state(self, q: State) -> int:
+        """
+        Returns the integer id of the state q, assigning the next
+        free id if q has not been seen. The transitions of the state
+        with id i are stored as bitsets of destination ids in
+        _nfa_trans[i * |alphabet| + a] and _eps_trans[i].
+
+        :param q: state
+        :type q: State
+        :return: id of q
+        :rtype: int
+        """
+        q_id = self._state_id.get(q)
+        if q_id is None:
+            q_id = self._state_id[q] = len(self._states_by_id)
+            self._states_by_id.append(q)
+            self._nfa_trans.extend([0] * self._alpha_n)
+            self._eps_trans.append(0)
+        return q_id
+
     def transition_exists(self, q1: State, a: str) -> bool:
         """
         Checks whether the transition
@@ -74,27 +130,89 @@ class NFA(FSA):
                  the nfa accepted the input string.
         :rtype: tuple(State, bool)
         """
-        for start_state in self._start_states:
-            stack = [(start_state, 0)]
+        if self._dfa_dirty:
+            self._compile()
 
-            while len(stack) > 0:
-                state, index = stack.pop()
+        q, read = kernels.parse(self._dfa_trans, self._alpha_n,
+                                self._dfa_start, s, self._sym_id)
 
-                if index == len(s):
-                    if state in self._accept_states:
-                        return state, True
-                    else:
-                        continue
+        accept = self._dfa_accept[q] if read else None
+        if accept is None:
+            return next(iter(self._start_states)), False
 
-                symbols = self._transitions[state]
-                for symbol, to_states in symbols.items():
-                    for to_state in to_states:
-                        if symbol == '':
-                            stack.append((to_state, index))
-                        elif symbol == s[index]:
-                            stack.append((to_state, index + 1))
+        return accept, True
 
-        return next(iter(self._start_states)), False
+    def _compile(self):
+        """
+        Compiles the nfa to an equivalent dfa by performing the
+        subset construction over the subsets reachable from the
+        start states. The dfa is stored as a flat transition table,
+        table[q * |alphabet| + a] = r, where an entry of -1 means
+        that no nfa state is reachable. Subsets of nfa states are
+        encoded as int bitsets of state ids, so the union of two
+        subsets is a single bitwise or. The table is cached on the
+        instance and is only rebuilt when a transition, start or
+        accepting state that was not already present is added.
+        """
+        for q in self._start_states.union(self._accept_states):
+            self._intern_state(q)
+
+        n_sym = self._alpha_n
+        state_id = self._state_id
+
+        closures = self._closure_bits()
+
+        moves = []
+        for bs in self._nfa_trans:
+            move = 0
+            while bs:
+                lsb = bs & -bs
+                move |= closures[lsb.bit_length() - 1]
+                bs ^= lsb
+            moves.append(move)
+
+        accept_mask = 0
+        for q in self._accept_states:
+            accept_mask |= 1 << state_id[q]
+
+        start = 0
+        for q in self._start_states:
+            start |= closures[state_id[q]]
+
+        subsets = [start]
+        subset_id = {start: 0}
+        trans = array('i')
+        accept = []
+
+        for r in subsets:
+            accepting = r & accept_mask
+            if accepting:
+                lsb = accepting & -accepting
+                accept.append(self._states_by_id[lsb.bit_length() - 1])
+            else:
+                accept.append(None)
+
+            for a in range(n_sym):
+                t = 0
+                bs = r
+                while bs:
+                    lsb = bs & -bs
+                    t |= moves[(lsb.bit_length() - 1) * n_sym + a]
+                    bs ^= lsb
+
+                if not t:
+                    trans.append(-1)
+                    continue
+
+                if t not in subset_id:
+                    subset_id[t] = len(subsets)
+                    subsets.append(t)
+                trans.append(subset_id[t])
+
+        self._dfa_start = 0
+        self._dfa_accept = accept
+        self._dfa_trans = trans
+        self._dfa_dirty = False
 
     def add_state(self, state: State):
         """
@@ -111,7 +229,9 @@ class NFA(FSA):
         :param state: state to make accepting state.
         :type state: State
         """
-        self._accept_states.add(state)
+        if state not in self._accept_states:
+            self._accept_states.add(state)
+            self._dfa_dirty = True
 
     def add_start_state(self, state: State):
         """
@@ -121,7 +241,9 @@ class NFA(FSA):
         """
         if state not in self._states:
             self._states.add(state)
-        self._start_states.add(state)
+        if state not in self._start_states:
+            self._start_states.add(state)
+            self._dfa_dirty = True
 
     def get_states(self) -> Set[State]:
         """
@@ -236,7 +358,10 @@ class NFA(FSA):
 
     def copy(self):
         """
-        Performs a deep copy of the instance.
+        Performs a deep copy of the instance. States
+        are immutable, so they are shared with the copy,
+        as is the compiled parse table, which is replaced
+        rather than modified when the nfa changes.
 
         :return: A deep copy of the nfa.
         :rtype: NFA
@@ -247,7 +372,18 @@ class NFA(FSA):
         nfa._states = self._states.copy()
         nfa._accept_states = self._accept_states.copy()
 
-        nfa._transitions = copy.deepcopy(self._transitions)
+        for q, from_map in self._transitions.items():
+            nfa._transitions[q] = {a: to_states.copy() for a, to_states in from_map.items()}
+        nfa._state_id = self._state_id.copy()
+        nfa._states_by_id = self._states_by_id.copy()
+        nfa._nfa_trans = self._nfa_trans.copy()
+        nfa._eps_trans = self._eps_trans.copy()
+
+        if not self._dfa_dirty:
+            nfa._dfa_start = self._dfa_start
+            nfa._dfa_accept = self._dfa_accept
+            nfa._dfa_trans = self._dfa_trans
+            nfa._dfa_dirty = False
 
         return nfa
 
@@ -255,81 +391,95 @@ class NFA(FSA):
         """
         Converts the nfa instance to its
         equivalent deterministic finite
-        state machine.
+        state machine. The subsets of nfa states
+        reachable from the start states are taken
+        from the table built by _compile, where
+        every subset is a bitset of state ids.
         Please consult Sipser for an explanation of this algorithm:
         https://www.amazon.com/Introduction-Theory-Computation-Michael-Sipser/dp/113318779X
 
-        :return: the equivalent dfa
+        The subset table is minimized in place by partition
+        refinement (Moore's algorithm), and the minimal dfa is
+        then built directly, with its states named in breadth-first
+        order, as DFA.minimize followed by DFA.rename_states would.
+
+        :return: the equivalent minimal dfa
         :rtype: DFA
         """
+        if self._dfa_dirty:
+            self._compile()
+
+        n_sym = self._alpha_n
+        alphabet = sorted(self.alphabet)
+
+        # The undefined transitions (-1) of the subset table go
+        # to an explicit dead state with the id n.
+        n = len(self._dfa_accept)
+        trans = [r if r >= 0 else n for r in self._dfa_trans] + [n] * n_sym
+        accepting = [q is not None for q in self._dfa_accept] + [False]
+
+        block = [int(accept) for accept in accepting]
+        n_blocks = len(set(block))
+        while True:
+            signatures = {}
+            new_block = [
+                signatures.setdefault(
+                    (block[q],) + tuple(block[r] for r in trans[q * n_sym:(q + 1) * n_sym]),
+                    len(signatures))
+                for q in range(n + 1)
+            ]
+            block = new_block
+            if len(signatures) == n_blocks:
+                break
+            n_blocks = len(signatures)
+
+        representative = {}
+        for q in range(n + 1):
+            representative.setdefault(block[q], q)
+
+        names = {block[0]: State('0')}
+        dfa = DFA(self.alphabet, names[block[0]])
+
+        queue = deque([block[0]])
+        while len(queue) > 0:
+            b = queue.popleft()
+            q = representative[b]
 
-        if len(self._start_states) > 1:
-            cpy = self.copy()
-            new_q = State('__q0__')
-            cpy._states.add(new_q)
-            for q in cpy._start_states:
-                cpy.add_transition(new_q, q, '')
-            cpy._start_states = {new_q}
-        else:
-            cpy = self.copy()
-
-        q_prime = set()
-        power_set_to_states = {}
-        for q in cpy._power_set(cpy._states):
-            new_state = State(''.join(sorted(map(str, q))))
-            q_prime.add(new_state)
-            power_set_to_states[new_state] = set(q)
-
-        accept_prime = set()
-        transitions = defaultdict(OrderedDict)
-        q0_prime = self._epsilon_closure(cpy,
-                                         next(iter(cpy._start_states)))
-
-        for r in q_prime:
-            for a in cpy.alphabet:
-                transitions[r][a] = set()
-                for state in power_set_to_states[r]:
-
-                    if cpy.transition_exists(state, a):
-                        for ts in cpy.transition(state, a):
-                            for to_state in self._epsilon_closure(cpy, ts):
-                                transitions[r][a].add(to_state)
-
-            if any([s in cpy._accept_states for s in power_set_to_states[r]]):
-                accept_prime.add(r)
-
-        start_state = State(''.join(sorted(map(str, q0_prime))))
-        dfa = DFA(self.alphabet, start_state)
-
-        dfa.states = q_prime.copy()
-        dfa.accept_states = accept_prime.copy()
-
-        for from_state in transitions.keys():
-            for symbol, to_states in transitions[from_state].items():
-                to_state = State(''.join(sorted(map(str, to_states))))
-                dfa.add_transition(from_state, to_state, symbol)
-
-        return dfa.minimize()
-
-    @staticmethod
-    def _epsilon_closure(nfa, q: State):
-        closure_set = {q}
-        stack = [q]
+            if accepting[q]:
+                dfa.accept_states.add(names[b])
 
-        while len(stack) > 0:
-            state = stack.pop()
+            for a, letter in enumerate(alphabet):
+                to_block = block[trans[q * n_sym + a]]
+                if to_block not in names:
+                    names[to_block] = State(str(len(names)))
+                    queue.append(to_block)
 
-            if nfa.transition_exists(state, ''):
-                for to_state in nfa.transition(state, ''):
-                    if to_state not in closure_set:
-                        closure_set.add(to_state)
-                        stack.append(to_state)
+                dfa.add_transition(names[b], names[to_block], letter)
 
-        return closure_set
+        return dfa
 
-    @staticmethod
-    def _power_set(q):
-        return chain.from_iterable(combinations(q, r) for r in range(len(q) + 1))
+    def _closure_bits(self) -> List[int]:
+        """
+        Returns the epsilon-closure of every interned state as
+        an int bitset of state ids, indexed by state id. The
+        closures are found with a depth first search over the
+        epsilon bitsets, marking the visited states in the
+        closure bitset itself.
+
+        :return: The epsilon-closure bitset of every state
+        :rtype: List[int]
+        """
+        eps_adj = self._eps_trans
+        closures = []
+        for i in range(len(self._states_by_id)):
+            closure = 1 << i
+            stack = [i]
+            while len(stack) > 0:
+                for j in _bits(eps_adj[stack.pop()] & ~closure):
+                    closure |= 1 << j
+                    stack.append(j)
+            closures.append(closure)
+        return closures
 
     def __str__(self):
         """
@@ -339,18 +489,19 @@ class NFA(FSA):
         :return: String representation of the nfa
         :rtype: str
         """
-        rep = [
-            'Initial states:    = {}'.format(set(map(lambda s: s.name, self._start_states))),
-            'Alphabet:          = {}'.format(self.alphabet),
-            'States:            = {}'.format(set(map(str, self._states))),
-            'Accepting states:  = {}'.format(set(map(str, self._accept_states))),
-            '\nTransition function: delta'
-        ]
-
-        for state in sorted(self._transitions.keys()):
-            rep.append('state = q_{}'.format(state))
-            for letter, to_state in self._transitions[state].items():
-                rep.append('delta(q_{}, {}) = q_{}'.format(state, letter, ', '.join(map(str, to_state))))
-            rep.append('')
+        rep = []
+        add = rep.append
+
+        add(f'Initial states:    = {self._fmt_states(self._start_states)}')
+        add(f'Alphabet:          = {self.alphabet}')
+        add(f'States:            = {self._fmt_states(self._states)}')
+        add(f'Accepting states:  = {self._fmt_states(self._accept_states)}')
+        add('\nTransition function: delta')
+
+        for state in sorted(self._transitions):
+            add(f'state = q_{state}')
+            for letter, to_states in self._transitions[state].items():
+                add(f'delta(q_{state}, {letter}) = q_{", ".join(map(str, to_states))}')
+            add('')
 
         return '\n'.join(rep)
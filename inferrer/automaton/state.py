@@ -1,24 +1,48 @@
+from weakref import WeakValueDictionary
+
+
 class State:
 
+    __slots__ = ('__name', '__hash', '__weakref__')
+
+    _interned = WeakValueDictionary()
+
+    def __new__(cls, name: str):
+        state = cls._interned.get(name)
+        if state is None:
+            state = super().__new__(cls)
+            state.__name = name
+            state.__hash = hash(name)
+            cls._interned[name] = state
+        return state
+
     def __init__(self, name: str):
         """
         Represents a State in a
         finite state acceptor.
 
+        States are interned, constructing a State
+        with the name of a State that is still alive
+        returns that same instance. The hash of the
+        name is computed once and cached.
+
         :param name: label of the state
         :type name: str
         """
-        self.__name = name
 
     @property
     def name(self):
         return self.__name
 
+    def __reduce__(self):
+        return State, (self.__name,)
+
     def __hash__(self):
-        return hash(self.__name)
+        return self.__hash
 
     def __eq__(self, other):
-        return self.__name == other.name
+        return self is other or \
+            (isinstance(other, State) and self.__name == other.name)
 
     def __lt__(self, other):
         return self.name < other.name
@@ -33,7 +57,7 @@ class State:
         return self.name >= other.name
 
     def __ne__(self, other):
-        return self.name != other.name
+        return not self == other
 
     def __str__(self):
         return self.name
@@ -205,10 +205,11 @@ class TestRPNI(unittest.TestCase):
         dfa = rpni.learn()
 
         self.assertEqual(10, len(dfa.states))
-        self.assertSetEqual({automaton.State(''), automaton.State('111111111')}, dfa.accept_states)
+        self.assertSetEqual({automaton.State(''), automaton.State('111'),
+                             automaton.State('111111111')}, dfa.accept_states)
         self.assertSetEqual({automaton.State('1'), automaton.State('11'),
-                             automaton.State('111111'),
-                             automaton.State('1111')}, dfa.reject_states)
+                             automaton.State('1111'), automaton.State('111111'),
+                             automaton.State('11111111')}, dfa.reject_states)
 
         for s in s_plus:
             self.assertTrue(dfa.parse_string(s)[1])
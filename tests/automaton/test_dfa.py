@@ -88,6 +88,19 @@ class TestAutomaton(unittest.TestCase):
         self.assertFalse(accepted)
         self.assertEqual(automaton.State(''), q)
 
+    def test_build_pta_03(self):
+        positive_examples = {'aa', 'aba', 'bba'}
+        negative_examples = {'ab', 'abab'}
+
+        pta = automaton.build_pta(positive_examples, negative_examples)
+        prefixes = {'', 'a', 'b', 'aa', 'ab', 'bb', 'aba', 'bba', 'abab'}
+
+        self.assertSetEqual(set(map(automaton.State, prefixes)), pta.states)
+        self.assertFalse(pta.transition_exists(automaton.State('aa'), 'a'))
+        self.assertFalse(pta.transition_exists(automaton.State('b'), 'a'))
+        self.assertEqual(automaton.State('bb'),
+                         pta.transition(automaton.State('b'), 'b'))
+
     def test_build_pta_04(self):
         positive_examples = {'aaaa', 'aaba', 'bba', 'bbaba'}
         negative_examples = {'a', 'bb', 'aab', 'aba'}
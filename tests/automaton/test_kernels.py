@@ -0,0 +1,55 @@
+import unittest
+from array import array
+from inferrer.automaton import kernels
+
+
+class TestKernels(unittest.TestCase):
+
+    def setUp(self):
+        # (ab)* over the alphabet {a: 0, b: 1}, the state
+        # with id 0 is the start state.
+        self.sym_id = {'a': 0, 'b': 1}
+        self.trans = array('i', [1, -1,
+                                 -1, 0])
+
+    def test_parse_01(self):
+        for n in [0, 1, 5, kernels.NATIVE_MIN_LENGTH, 1000]:
+            q, read = kernels.parse(self.trans, 2, 0, 'ab' * n, self.sym_id)
+            self.assertTrue(read)
+            self.assertEqual(0, q)
+
+            q, read = kernels.parse(self.trans, 2, 0, 'ab' * n + 'a', self.sym_id)
+            self.assertTrue(read)
+            self.assertEqual(1, q)
+
+    def test_parse_02(self):
+        for n in [0, 1, 5, kernels.NATIVE_MIN_LENGTH, 1000]:
+            q, read = kernels.parse(self.trans, 2, 0, 'ab' * n + 'b', self.sym_id)
+            self.assertFalse(read)
+            self.assertEqual(0, q)
+
+            q, read = kernels.parse(self.trans, 2, 0, 'ab' * n + 'ac', self.sym_id)
+            self.assertFalse(read)
+            self.assertEqual(1, q)
+
+    def test_parse_03(self):
+        table = kernels.char_table(self.sym_id)
+        for n in [1, kernels.NATIVE_MIN_LENGTH, 1000]:
+            self.assertEqual((0, True),
+                             kernels.parse(self.trans, 2, 0, 'ab' * n, self.sym_id, table))
+            self.assertEqual((1, False),
+                             kernels.parse(self.trans, 2, 0, 'ab' * n + 'a\u00ff', self.sym_id, table))
+            self.assertEqual((1, False),
+                             kernels.parse(self.trans, 2, 0, 'ab' * n + 'a\u2603', self.sym_id, table))
+
+    def test_char_table_01(self):
+        self.assertIsNone(kernels.char_table({'a': 0, '\u2603': 1}))
+
+    def test_run_01(self):
+        self.assertEqual((0, True), kernels.run(self.trans, 2, 0, [0, 1, 0, 1]))
+        self.assertEqual((1, False), kernels.run(self.trans, 2, 0, [0, 0]))
+        self.assertEqual((0, False), kernels.run(self.trans, 2, 0, [-1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
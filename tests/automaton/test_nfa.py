@@ -131,6 +131,69 @@ class TestNFA(unittest.TestCase):
         _, accepted = nfa.parse_string('babba')
         self.assertFalse(accepted)
 
+    def test_nfa_04(self):
+        nfa = automaton.NFA({'a', 'b'})
+
+        q1 = automaton.State('q1')
+        q2 = automaton.State('q2')
+
+        nfa.add_start_state(q1)
+        nfa.add_state(q2)
+        nfa.add_transition(q1, q2, 'a')
+        nfa.add_accepting_state(q2)
+
+        self.assertTrue(nfa.parse_string('a')[1])
+        self.assertFalse(nfa.parse_string('ab')[1])
+        self.assertFalse(nfa.parse_string('c')[1])
+
+        nfa.add_transition(q2, q2, 'b')
+
+        state, accepted = nfa.parse_string('ab' + 'b' * 1000)
+        self.assertTrue(accepted)
+        self.assertEqual(q2, state)
+
+    def test_nfa_05(self):
+        nfa = automaton.NFA({'a', 'b'})
+
+        q1 = automaton.State('q1')
+        q2 = automaton.State('q2')
+        q3 = automaton.State('q3')
+
+        nfa.add_start_state(q1)
+        nfa.add_transition(q1, q2, '')
+        nfa.add_transition(q2, q1, '')
+        nfa.add_transition(q2, q3, 'a')
+        nfa.add_transition(q3, q1, '')
+        nfa.add_accepting_state(q1)
+
+        self.assertTrue(nfa.parse_string('')[1])
+        self.assertTrue(nfa.parse_string('aaa')[1])
+        self.assertFalse(nfa.parse_string('ab')[1])
+
+    def test_nfa_06(self):
+        nfa = automaton.NFA({'a'})
+
+        # Three epsilon cycles q0 <-> q1, q2 -> q3 -> q4 -> q2
+        # and q5 <-> q6, chained q1 -> q2 and q4 -> q5.
+        q = [automaton.State('q{}'.format(i)) for i in range(8)]
+        for q1, q2 in [(0, 1), (1, 0), (1, 2), (2, 3), (3, 4),
+                       (4, 2), (4, 5), (5, 6), (6, 5)]:
+            nfa.add_transition(q[q1], q[q2], '')
+        nfa.add_transition(q[6], q[7], 'a')
+
+        closures = nfa._closure_bits()
+
+        def closure(i):
+            bits = closures[nfa._state_id[q[i]]]
+            return {r for r in q if r in nfa._state_id and bits >> nfa._state_id[r] & 1}
+
+        self.assertSetEqual(set(q[:7]), closure(0))
+        self.assertSetEqual(set(q[:7]), closure(1))
+        self.assertSetEqual(set(q[2:7]), closure(2))
+        self.assertSetEqual(set(q[2:7]), closure(4))
+        self.assertSetEqual({q[5], q[6]}, closure(5))
+        self.assertSetEqual({q[7]}, closure(7))
+
     def test_nfa_to_dfa_01(self):
         nfa = automaton.NFA({'a', 'b'})
 
@@ -258,6 +321,55 @@ class TestNFA(unittest.TestCase):
         self.assertEqual(4, len(dfa.states))
         self.assertEqual(3, len(dfa.accept_states))
 
+    def test_nfa_to_dfa_05(self):
+        nfa = automaton.NFA({'a', 'b'})
+
+        states = [automaton.State(str(i)) for i in range(25)]
+        for state in states:
+            nfa.add_state(state)
+
+        for q1, q2 in zip(states, states[1:]):
+            nfa.add_transition(q1, q2, 'a')
+
+        nfa.add_accepting_state(states[-1])
+        nfa.add_start_state(states[0])
+
+        dfa = nfa.to_dfa()
+
+        self.assertEqual(26, len(dfa.states))
+        self.assertEqual(1, len(dfa.accept_states))
+        self.assertTrue(dfa.parse_string('a' * 24)[1])
+        self.assertFalse(dfa.parse_string('a' * 23)[1])
+
+    def test_nfa_to_dfa_06(self):
+        nfa = automaton.NFA({'a', 'b'})
+
+        q0 = automaton.State('q0')
+        q1 = automaton.State('q1')
+        q2 = automaton.State('q2')
+        q3 = automaton.State('q3')
+        q4 = automaton.State('q4')
+
+        nfa.add_start_state(q0)
+        nfa.add_transition(q0, q1, 'a')
+        nfa.add_transition(q0, q2, 'b')
+        nfa.add_transition(q1, q3, 'a')
+        nfa.add_transition(q2, q4, 'a')
+        nfa.add_accepting_state(q3)
+        nfa.add_accepting_state(q4)
+
+        dfa = nfa.to_dfa()
+
+        # The subsets {q1}, {q2} and {q3}, {q4} are equivalent
+        # and have to be merged, which leaves the start state, a
+        # single state per pair and the dead state.
+        self.assertEqual(5, len(nfa._dfa_accept))
+        self.assertEqual(4, len(dfa.states))
+        self.assertEqual(dfa, dfa.minimize())
+        self.assertTrue(dfa.parse_string('aa')[1])
+        self.assertTrue(dfa.parse_string('ba')[1])
+        self.assertFalse(dfa.parse_string('ab')[1])
+
     @staticmethod
     def _combinations(s: Set[str], repeat: int) -> Generator:
         for rep in range(repeat + 1):
@@ -1,3 +1,4 @@
+import copy
 import unittest
 from inferrer.automaton.state import State
 
@@ -26,6 +27,14 @@ class TestState(unittest.TestCase):
         self.assertEqual(True, State('b') in test_dict.keys())
         self.assertEqual(False, State('d') in test_dict.keys())
 
+    def test_state_03(self):
+        q = State('a')
+        self.assertIs(q, State('a'))
+        self.assertEqual(hash('a'), hash(q))
+        self.assertIs(q, copy.deepcopy(q))
+        self.assertNotEqual(q, State('b'))
+        self.assertNotEqual(q, 'a')
+
 
 if __name__ == '__main__':
     unittest.main()